@@ -0,0 +1,285 @@
+import asyncio
+from abc import ABC, abstractmethod
+import math
+import os
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from dotenv import load_dotenv
+from app.auth import verify_token
+
+load_dotenv()
+
+# Admission control for the expensive endpoints (bcrypt, full catalog scans, SMTP).
+# Each route class gets a per-process concurrency limit with a short bounded queue,
+# plus token-bucket rate limits per user and globally. Excess requests are shed
+# with 429 (rate limited) or 503 (overloaded) and a Retry-After header.
+# "Per user" is the JWT email, else the email in the request body (login/signup),
+# else the peer address.
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+@dataclass
+class RouteClassLimits:
+    max_concurrency: int
+    max_queue: int
+    queue_timeout: float  # seconds a request may wait for a free slot
+    global_rate: float  # tokens per second, 0 disables
+    global_burst: int
+    user_rate: float  # tokens per second, 0 disables
+    user_burst: int
+
+def _limits_from_env(route_class: str, defaults: RouteClassLimits) -> RouteClassLimits:
+    prefix = f"ADMISSION_{route_class.upper()}_"
+    return RouteClassLimits(
+        max_concurrency=_env_int(prefix + "MAX_CONCURRENCY", defaults.max_concurrency),
+        max_queue=_env_int(prefix + "MAX_QUEUE", defaults.max_queue),
+        queue_timeout=_env_float(prefix + "QUEUE_TIMEOUT", defaults.queue_timeout),
+        global_rate=_env_float(prefix + "GLOBAL_RATE", defaults.global_rate),
+        global_burst=_env_int(prefix + "GLOBAL_BURST", defaults.global_burst),
+        user_rate=_env_float(prefix + "USER_RATE", defaults.user_rate),
+        user_burst=_env_int(prefix + "USER_BURST", defaults.user_burst),
+    )
+
+ROUTE_CLASS_LIMITS = {
+    # login / signup: bcrypt hashing in the threadpool, ~0.25 s of CPU per hash.
+    # 4 concurrent hashes would sustain ~16/s on 4 free cores; the global rate is
+    # set to ~8/s, what a 2-core worker can hash while still serving other routes.
+    # The per-user bucket is keyed on the submitted email (see _client_identity).
+    "auth": _limits_from_env("auth", RouteClassLimits(
+        max_concurrency=4, max_queue=16, queue_timeout=2.0,
+        global_rate=8.0, global_burst=8, user_rate=0.2, user_burst=5,
+    )),
+    # full catalog load and product search
+    "catalog": _limits_from_env("catalog", RouteClassLimits(
+        max_concurrency=8, max_queue=32, queue_timeout=5.0,
+        global_rate=50.0, global_burst=100, user_rate=2.0, user_burst=10,
+    )),
+    # inquiries: DB write + SMTP
+    "inquiry": _limits_from_env("inquiry", RouteClassLimits(
+        max_concurrency=4, max_queue=16, queue_timeout=5.0,
+        global_rate=10.0, global_burst=20, user_rate=0.1, user_burst=3,
+    )),
+}
+
+# Rate limit backends
+class RateLimitBackend(ABC):
+    """Token bucket store. Subclass to share buckets between workers (e.g. Redis)."""
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take one token from the bucket `key`.
+
+        Returns 0 if the request is admitted, otherwise the number of seconds
+        until a token becomes available.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def refund(self, key: str, rate: float, burst: int):
+        """Give back a token taken from `key` by a request that was shed later on."""
+        raise NotImplementedError
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    def __init__(self, max_keys: int = 10000):
+        # Hard cap on stored buckets; the least recently updated ones are evicted,
+        # which only resets them to full
+        self.max_keys = max_keys
+        # key -> (tokens, last update), ordered from least to most recently updated
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def _tokens(self, key: str, rate: float, burst: int, now: float) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return float(burst)
+        return min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+
+    def _store(self, key: str, tokens: float, now: float):
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        tokens = self._tokens(key, rate, burst, now)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+
+        self._store(key, tokens, now)
+        return retry_after
+
+    async def refund(self, key: str, rate: float, burst: int):
+        if key not in self._buckets:
+            return
+        now = time.monotonic()
+        self._store(key, min(float(burst), self._tokens(key, rate, burst, now) + 1), now)
+
+# Per-process concurrency limiting
+class ConcurrencyLimiter:
+    def __init__(self, limit: int, max_queue: int, queue_timeout: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self) -> Optional[str]:
+        """Wait for a free slot. Returns None once admitted, else the shed reason."""
+        if self._semaphore.locked() and self.queued >= self.max_queue:
+            return "queue_full"
+
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            return "queue_timeout"
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        return None
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+class AdmissionController:
+    def __init__(self, route_class: str, limits: RouteClassLimits):
+        self.route_class = route_class
+        self.limits = limits
+        self.limiter = ConcurrencyLimiter(limits.max_concurrency, limits.max_queue, limits.queue_timeout)
+        self.admitted = 0
+        self.shed = {
+            "user_rate_limited": 0,
+            "global_rate_limited": 0,
+            "queue_full": 0,
+            "queue_timeout": 0,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.limiter.in_flight,
+            "queued": self.limiter.queued,
+            "max_concurrency": self.limits.max_concurrency,
+            "max_queue": self.limits.max_queue,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+        }
+
+    def _reject(self, reason: str, status_code: int, retry_after: float):
+        self.shed[reason] += 1
+        raise HTTPException(
+            status_code=status_code,
+            detail="Too many requests" if status_code == status.HTTP_429_TOO_MANY_REQUESTS else "Server is busy",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+    def _user_key(self, identity: str) -> str:
+        return f"{self.route_class}:user:{identity}"
+
+    def _global_key(self) -> str:
+        return f"{self.route_class}:global"
+
+    async def check_rate(self, identity: str):
+        limits = self.limits
+        if limits.user_rate > 0:
+            retry_after = await _backend.take(self._user_key(identity), limits.user_rate, limits.user_burst)
+            if retry_after:
+                self._reject("user_rate_limited", status.HTTP_429_TOO_MANY_REQUESTS, retry_after)
+        if limits.global_rate > 0:
+            retry_after = await _backend.take(self._global_key(), limits.global_rate, limits.global_burst)
+            if retry_after:
+                # The request never ran, so don't count it against the user
+                if limits.user_rate > 0:
+                    await _backend.refund(self._user_key(identity), limits.user_rate, limits.user_burst)
+                self._reject("global_rate_limited", status.HTTP_429_TOO_MANY_REQUESTS, retry_after)
+
+    async def acquire_slot(self, identity: str):
+        reason = await self.limiter.acquire()
+        if reason:
+            # Shed without running: give back the tokens check_rate took
+            limits = self.limits
+            if limits.user_rate > 0:
+                await _backend.refund(self._user_key(identity), limits.user_rate, limits.user_burst)
+            if limits.global_rate > 0:
+                await _backend.refund(self._global_key(), limits.global_rate, limits.global_burst)
+            self._reject(reason, status.HTTP_503_SERVICE_UNAVAILABLE, limits.queue_timeout)
+        self.admitted += 1
+
+_backend: RateLimitBackend = InMemoryRateLimitBackend()
+_controllers = {name: AdmissionController(name, limits) for name, limits in ROUTE_CLASS_LIMITS.items()}
+_optional_security = HTTPBearer(auto_error=False)
+
+def set_rate_limit_backend(backend: RateLimitBackend):
+    global _backend
+    _backend = backend
+
+def get_admission_stats() -> dict:
+    return {name: controller.stats() for name, controller in _controllers.items()}
+
+# Bearer token for the stats endpoint; the endpoint is disabled when unset
+ADMISSION_STATS_TOKEN = os.getenv("ADMISSION_STATS_TOKEN")
+
+async def require_stats_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_optional_security)
+):
+    if not ADMISSION_STATS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not credentials or not secrets.compare_digest(credentials.credentials, ADMISSION_STATS_TOKEN):
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+async def _client_identity(request: Request) -> str:
+    # Read the header directly rather than through a security dependency, which
+    # would mark unauthenticated routes (login/signup) as bearer-protected in OpenAPI.
+    # Only decode the JWT here; the DB user lookup runs after admission.
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            return "email:" + verify_token(token)["email"].lower()
+        except HTTPException:
+            pass
+
+    # Anonymous login/signup requests are keyed on the submitted email rather than
+    # the peer address, which every client shares behind a proxy or NAT. Forwarded
+    # headers are not trusted. The body is already cached by FastAPI at this point.
+    try:
+        body = await request.json()
+    except ValueError:
+        body = None
+    if isinstance(body, dict) and isinstance(body.get("email"), str):
+        return "email:" + body["email"].strip().lower()
+
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+def admission(route_class: str):
+    """Dependency that admits a request into `route_class` or sheds it.
+
+    Use it in the route decorator (`dependencies=[Depends(admission("auth"))]`)
+    so it runs before the auth and DB dependencies.
+    """
+    controller = _controllers[route_class]
+
+    async def admit(request: Request):
+        identity = await _client_identity(request)
+        await controller.check_rate(identity)
+        await controller.acquire_slot(identity)
+        try:
+            yield
+        finally:
+            controller.limiter.release()
+
+    return admit
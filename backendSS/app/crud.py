@@ -1,4 +1,5 @@
 from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional
 from app.models import User, Storehouse, Product, Inquiry
 from app.schemas import *
 
@@ -40,6 +41,16 @@ def get_product_with_owner(db: Session, product_id: int):
         joinedload(Product.storehouse)
     ).filter(Product.id == product_id).first()
 
+def get_products_with_owner_by_ids(db: Session, product_ids: List[int], owner_id: Optional[int] = None):
+    # Single IN query; owner_id restricts the result to that owner's products
+    query = db.query(Product).options(
+        joinedload(Product.owner),
+        joinedload(Product.storehouse)
+    ).filter(Product.id.in_(product_ids))
+    if owner_id is not None:
+        query = query.filter(Product.owner_id == owner_id)
+    return query.all()
+
 def get_products_by_storehouse(db: Session, storehouse_id: int):
     return db.query(Product).filter(Product.storehouse_id == storehouse_id).all()
 
@@ -1,6 +1,7 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 import uvicorn
@@ -10,6 +11,7 @@ from app.models import Base, Product, Storehouse
 from app.schemas import *
 from app.auth import get_current_user, create_access_token, verify_password, get_password_hash
 from app.email_service import send_inquiry_email
+from app.admission import admission, get_admission_stats, require_stats_token
 from app import crud
 from dotenv import load_dotenv
 import os
@@ -37,7 +39,7 @@ app.add_middleware(
 security = HTTPBearer()
 
 # Auth endpoints
-@app.post("/owners/signup", response_model=UserResponse)
+@app.post("/owners/signup", response_model=UserResponse, dependencies=[Depends(admission("auth"))])
 async def owner_signup(user: UserCreate, db: Session = Depends(get_db)):
     db_user = crud.get_user_by_email(db, email=user.email)
     if db_user:
@@ -46,11 +48,12 @@ async def owner_signup(user: UserCreate, db: Session = Depends(get_db)):
             detail="Email already registered"
         )
     
-    hashed_password = get_password_hash(user.password)
+    # bcrypt runs in the threadpool so it doesn't block the event loop
+    hashed_password = await run_in_threadpool(get_password_hash, user.password)
     db_user = crud.create_user(db, email=user.email, hashed_password=hashed_password, role="owner")
     return db_user
 
-@app.post("/buyers/signup", response_model=UserResponse)
+@app.post("/buyers/signup", response_model=UserResponse, dependencies=[Depends(admission("auth"))])
 async def buyer_signup(user: UserCreate, db: Session = Depends(get_db)):
     db_user = crud.get_user_by_email(db, email=user.email)
     if db_user:
@@ -59,14 +62,15 @@ async def buyer_signup(user: UserCreate, db: Session = Depends(get_db)):
             detail="Email already registered"
         )
     
-    hashed_password = get_password_hash(user.password)
+    # bcrypt runs in the threadpool so it doesn't block the event loop
+    hashed_password = await run_in_threadpool(get_password_hash, user.password)
     db_user = crud.create_user(db, email=user.email, hashed_password=hashed_password, role="buyer")
     return db_user
 
-@app.post("/owners/login", response_model=Token)
+@app.post("/owners/login", response_model=Token, dependencies=[Depends(admission("auth"))])
 async def owner_login(user: UserLogin, db: Session = Depends(get_db)):
     db_user = crud.get_user_by_email(db, email=user.email)
-    if not db_user or not verify_password(user.password, db_user.hashed_password) or db_user.role != "owner":
+    if not db_user or not await run_in_threadpool(verify_password, user.password, db_user.hashed_password) or db_user.role != "owner":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -75,10 +79,10 @@ async def owner_login(user: UserLogin, db: Session = Depends(get_db)):
     access_token = create_access_token(data={"sub": db_user.email, "role": db_user.role})
     return {"access_token": access_token, "token_type": "bearer", "user": db_user}
 
-@app.post("/buyers/login", response_model=Token)
+@app.post("/buyers/login", response_model=Token, dependencies=[Depends(admission("auth"))])
 async def buyer_login(user: UserLogin, db: Session = Depends(get_db)):
     db_user = crud.get_user_by_email(db, email=user.email)
-    if not db_user or not verify_password(user.password, db_user.hashed_password) or db_user.role != "buyer":
+    if not db_user or not await run_in_threadpool(verify_password, user.password, db_user.hashed_password) or db_user.role != "buyer":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -179,7 +183,7 @@ async def delete_product(
     return {"message": "Product deleted successfully"}
 
 # Buyer endpoints
-@app.get("/products", response_model=List[ProductWithOwnerResponse])
+@app.get("/products", response_model=List[ProductWithOwnerResponse], dependencies=[Depends(admission("catalog"))])
 async def get_all_products(
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -189,8 +193,31 @@ async def get_all_products(
     
     return crud.get_all_products_with_owner(db)
 
+# Batch product lookup (for buyers and owners)
+@app.post("/products/batch", response_model=ProductBatchResponse, dependencies=[Depends(admission("catalog"))])
+async def get_products_batch(
+    batch: ProductBatchRequest,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # For buyers: any product can be resolved
+    # For owners: only their own products, others are reported as missing
+    if current_user["role"] == "buyer":
+        owner_id = None
+    elif current_user["role"] == "owner":
+        owner_id = current_user["id"]
+    else:
+        raise HTTPException(status_code=403, detail="Invalid role")
+
+    product_ids = list(dict.fromkeys(batch.ids))
+    products = crud.get_products_with_owner_by_ids(db, product_ids=product_ids, owner_id=owner_id)
+
+    found = {product.id: product for product in products}
+    missing = [product_id for product_id in product_ids if product_id not in found]
+    return {"products": found, "missing": missing}
+
 # Product search (for buyers and owners)
-@app.get("/products/search", response_model=List[ProductWithOwnerResponse])
+@app.get("/products/search", response_model=List[ProductWithOwnerResponse], dependencies=[Depends(admission("catalog"))])
 async def search_products(
     q: str,
     current_user: dict = Depends(get_current_user),
@@ -236,7 +263,7 @@ async def search_storehouses(
         )
     ).all()
 
-@app.post("/products/{product_id}/inquiry")
+@app.post("/products/{product_id}/inquiry", dependencies=[Depends(admission("inquiry"))])
 async def send_product_inquiry(
     product_id: int,
     inquiry: InquiryCreate,
@@ -278,5 +305,10 @@ async def send_product_inquiry(
 async def root():
     return {"message": "Storage Management API is running"}
 
+# Admission control queue depth and shed counts, per route class (ADMISSION_STATS_TOKEN)
+@app.get("/admission/stats", dependencies=[Depends(require_stats_token)])
+async def admission_stats():
+    return get_admission_stats()
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List, Dict
 from datetime import datetime
 
 # User schemas
@@ -79,6 +79,16 @@ class ProductWithOwnerResponse(ProductResponse):
     class Config:
         from_attributes = True
 
+# Max number of ids accepted by a single batch lookup
+MAX_BATCH_PRODUCT_IDS = 100
+
+class ProductBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_PRODUCT_IDS)
+
+class ProductBatchResponse(BaseModel):
+    products: Dict[int, ProductWithOwnerResponse]
+    missing: List[int]
+
 # Inquiry schemas
 class InquiryBase(BaseModel):
     message: str
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import uuid
+
+# app.main creates tables and the mail config at import time, so point it at
+# a throwaway SQLite database and dummy mail settings before it is imported
+_db_fd, _db_path = tempfile.mkstemp(suffix=".db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+for name, value in {
+    "MAIL_USERNAME": "test",
+    "MAIL_PASSWORD": "test",
+    "MAIL_FROM": "noreply@example.com",
+    "MAIL_SERVER": "localhost",
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest
+from fastapi.testclient import TestClient
+from app import admission, crud
+from app.auth import create_access_token
+from app.database import SessionLocal
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limits(monkeypatch):
+    monkeypatch.setattr(admission, "_backend", admission.InMemoryRateLimitBackend())
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    def make(role):
+        user = crud.create_user(db, email=f"{uuid.uuid4().hex}@example.com", hashed_password="x", role=role)
+        token = create_access_token(data={"sub": user.email, "role": user.role})
+        return user, {"Authorization": f"Bearer {token}"}
+    return make
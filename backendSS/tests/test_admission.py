@@ -0,0 +1,232 @@
+import asyncio
+import pytest
+from app import admission
+from app.admission import ConcurrencyLimiter, InMemoryRateLimitBackend, RateLimitBackend, RouteClassLimits
+from app.database import get_db
+from app.main import app
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(admission.time, "monotonic", fake)
+    return fake
+
+
+def take(backend, key="k", rate=1.0, burst=2):
+    return asyncio.run(backend.take(key, rate, burst))
+
+
+# Token bucket
+def test_take_admits_up_to_burst_then_sheds(clock):
+    backend = InMemoryRateLimitBackend()
+    assert take(backend) == 0
+    assert take(backend) == 0
+    assert take(backend) == pytest.approx(1.0)
+
+
+def test_bucket_refills_over_time(clock):
+    backend = InMemoryRateLimitBackend()
+    take(backend, burst=1)
+    assert take(backend, burst=1) > 0
+
+    clock.now += 1.0
+    assert take(backend, burst=1) == 0
+
+
+def test_retry_after_accounts_for_partial_tokens(clock):
+    backend = InMemoryRateLimitBackend()
+    take(backend, rate=2.0, burst=1)
+    clock.now += 0.25
+    # half a token has refilled, the other half takes 0.25 s at 2 tokens/s
+    assert take(backend, rate=2.0, burst=1) == pytest.approx(0.25)
+
+
+def test_refund_gives_back_a_token(clock):
+    backend = InMemoryRateLimitBackend()
+    take(backend, burst=1)
+    asyncio.run(backend.refund("k", 1.0, 1))
+    assert take(backend, burst=1) == 0
+
+
+def test_max_keys_evicts_least_recently_updated(clock):
+    backend = InMemoryRateLimitBackend(max_keys=2)
+    take(backend, key="a")
+    take(backend, key="b")
+    take(backend, key="a")
+    take(backend, key="c")
+
+    assert list(backend._buckets) == ["a", "c"]
+
+
+def test_backend_subclass_must_implement_take():
+    class Incomplete(RateLimitBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+# Concurrency limiter
+def test_limiter_sheds_when_queue_is_full():
+    async def run():
+        limiter = ConcurrencyLimiter(limit=1, max_queue=0, queue_timeout=1.0)
+        assert await limiter.acquire() is None
+        assert await limiter.acquire() == "queue_full"
+        assert limiter.in_flight == 1
+
+    asyncio.run(run())
+
+
+def test_limiter_sheds_after_queue_timeout():
+    async def run():
+        limiter = ConcurrencyLimiter(limit=1, max_queue=1, queue_timeout=0.01)
+        assert await limiter.acquire() is None
+        assert await limiter.acquire() == "queue_timeout"
+        assert limiter.queued == 0
+
+    asyncio.run(run())
+
+
+def test_limiter_release_admits_queued_request():
+    async def run():
+        limiter = ConcurrencyLimiter(limit=1, max_queue=1, queue_timeout=1.0)
+        assert await limiter.acquire() is None
+
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.queued == 1
+
+        limiter.release()
+        assert await waiter is None
+        assert limiter.in_flight == 1
+        assert limiter.queued == 0
+
+    asyncio.run(run())
+
+
+# Admission on app routes
+@pytest.fixture
+def route_limits(monkeypatch):
+    """Swap in small limits (and fresh counters) for one route class."""
+    def apply(route_class, **overrides):
+        controller = admission._controllers[route_class]
+        limits = RouteClassLimits(**{
+            "max_concurrency": 4, "max_queue": 4, "queue_timeout": 1.0,
+            "global_rate": 0, "global_burst": 1, "user_rate": 0, "user_burst": 1,
+            **overrides,
+        })
+        monkeypatch.setattr(controller, "limits", limits)
+        monkeypatch.setattr(controller, "limiter", ConcurrencyLimiter(
+            limits.max_concurrency, limits.max_queue, limits.queue_timeout
+        ))
+        monkeypatch.setattr(controller, "admitted", 0)
+        monkeypatch.setattr(controller, "shed", {reason: 0 for reason in controller.shed})
+        return controller
+    return apply
+
+
+def login(client, email="someone@example.com"):
+    return client.post("/buyers/login", json={"email": email, "password": "secret"})
+
+
+def test_user_rate_limit_returns_429_with_retry_after(client, route_limits):
+    route_limits("auth", user_rate=0.25, user_burst=1)
+
+    assert login(client).status_code == 401
+    response = login(client)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "4"
+
+
+def test_anonymous_auth_requests_are_keyed_on_email(client, route_limits):
+    route_limits("auth", user_rate=0.25, user_burst=1)
+
+    assert login(client, "a@example.com").status_code == 401
+    assert login(client, "A@example.com").status_code == 429
+    assert login(client, "b@example.com").status_code == 401
+
+
+def test_queue_full_returns_503_with_retry_after(client, route_limits):
+    controller = route_limits("auth", max_concurrency=0, max_queue=0, queue_timeout=3.0)
+
+    response = login(client)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+    assert controller.shed["queue_full"] == 1
+
+
+def test_global_shed_refunds_user_token(client, route_limits):
+    route_limits("auth", user_rate=0.01, user_burst=1, global_rate=0.01, global_burst=0)
+    assert login(client).status_code == 429
+
+    route_limits("auth", user_rate=0.01, user_burst=1)
+    assert login(client).status_code == 401
+
+
+def test_concurrency_shed_refunds_rate_tokens(client, route_limits):
+    route_limits("auth", max_concurrency=0, max_queue=0, user_rate=0.01, user_burst=1,
+                 global_rate=0.01, global_burst=1)
+    assert login(client).status_code == 503
+
+    route_limits("auth", user_rate=0.01, user_burst=1, global_rate=0.01, global_burst=1)
+    assert login(client).status_code == 401
+
+
+def test_admission_runs_before_auth_and_db(client, route_limits):
+    route_limits("catalog", global_rate=0.01, global_burst=0)
+    calls = []
+
+    def tracking_get_db():
+        calls.append("get_db")
+        yield None
+
+    app.dependency_overrides[get_db] = tracking_get_db
+    try:
+        # No token: get_current_user would answer 403 if it ran first
+        response = client.get("/products")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 429
+    assert calls == []
+
+
+def test_stats_endpoint_is_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(admission, "ADMISSION_STATS_TOKEN", None)
+    assert client.get("/admission/stats").status_code == 404
+
+
+def test_stats_endpoint_rejects_wrong_token(client, monkeypatch):
+    monkeypatch.setattr(admission, "ADMISSION_STATS_TOKEN", "s3cret")
+    assert client.get("/admission/stats").status_code == 403
+    assert client.get("/admission/stats", headers={"Authorization": "Bearer nope"}).status_code == 403
+
+
+def test_stats_endpoint_reports_shed_counts(client, monkeypatch, route_limits):
+    monkeypatch.setattr(admission, "ADMISSION_STATS_TOKEN", "s3cret")
+    route_limits("auth", user_rate=0.01, user_burst=1)
+    login(client)
+    login(client)
+
+    response = client.get("/admission/stats", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    stats = response.json()["auth"]
+    assert stats["admitted"] == 1
+    assert stats["shed"]["user_rate_limited"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_admission_does_not_add_bearer_security_to_openapi():
+    paths = app.openapi()["paths"]
+    for path in ["/owners/signup", "/buyers/signup", "/owners/login", "/buyers/login"]:
+        assert "security" not in paths[path]["post"]
+    assert paths["/products/batch"]["post"]["security"] == [{"HTTPBearer": []}]
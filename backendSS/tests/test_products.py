@@ -0,0 +1,70 @@
+from app import crud
+from app.schemas import MAX_BATCH_PRODUCT_IDS, ProductCreate, StorehouseCreate
+
+
+def make_product(db, owner, name="Rice"):
+    storehouse = crud.create_storehouse(db, storehouse=StorehouseCreate(name="Main"), owner_id=owner.id)
+    product = ProductCreate(name=name, total_quantity=10, price_per_unit=2.5)
+    return crud.create_product(db, product=product, storehouse_id=storehouse.id, owner_id=owner.id)
+
+
+def batch(client, headers, ids):
+    return client.post("/products/batch", json={"ids": ids}, headers=headers)
+
+
+# Batch product lookup
+def test_batch_returns_products_keyed_by_id(client, db, make_user):
+    owner, _ = make_user("owner")
+    _, buyer_headers = make_user("buyer")
+    rice = make_product(db, owner, "Rice")
+    wheat = make_product(db, owner, "Wheat")
+
+    response = batch(client, buyer_headers, [rice.id, wheat.id])
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body["products"]) == {str(rice.id), str(wheat.id)}
+    assert body["products"][str(rice.id)]["name"] == "Rice"
+    assert body["products"][str(wheat.id)]["owner"]["email"] == owner.email
+    assert body["missing"] == []
+
+
+def test_batch_reports_unknown_ids_as_missing(client, db, make_user):
+    owner, _ = make_user("owner")
+    _, buyer_headers = make_user("buyer")
+    rice = make_product(db, owner)
+
+    body = batch(client, buyer_headers, [rice.id, 999999]).json()
+    assert list(body["products"]) == [str(rice.id)]
+    assert body["missing"] == [999999]
+
+
+def test_batch_collapses_duplicate_ids(client, db, make_user):
+    owner, _ = make_user("owner")
+    _, buyer_headers = make_user("buyer")
+    rice = make_product(db, owner)
+
+    body = batch(client, buyer_headers, [rice.id, rice.id, 999999, 999999]).json()
+    assert list(body["products"]) == [str(rice.id)]
+    assert body["missing"] == [999999]
+
+
+def test_batch_hides_other_owners_products(client, db, make_user):
+    owner, owner_headers = make_user("owner")
+    other_owner, _ = make_user("owner")
+    mine = make_product(db, owner)
+    theirs = make_product(db, other_owner)
+
+    body = batch(client, owner_headers, [mine.id, theirs.id]).json()
+    assert list(body["products"]) == [str(mine.id)]
+    assert body["missing"] == [theirs.id]
+
+
+def test_batch_rejects_empty_ids(client, make_user):
+    _, buyer_headers = make_user("buyer")
+    assert batch(client, buyer_headers, []).status_code == 422
+
+
+def test_batch_rejects_too_many_ids(client, make_user):
+    _, buyer_headers = make_user("buyer")
+    ids = list(range(1, MAX_BATCH_PRODUCT_IDS + 2))
+    assert batch(client, buyer_headers, ids).status_code == 422